@@ -0,0 +1,327 @@
+"""
+오프라인 도로명/지번 주소 검증
+Offline road-name / jibun address validation
+
+행정안전부 주소 DB를 해시 인덱스로 적재하여 검색용주소가 실제 존재하는 주소인지 확인한다.
+지원 형식: 도로명주소 한글, 위치정보요약('|' 구분, 헤더 없음) 또는 헤더가 있는 CSV.
+위치정보요약이나 X좌표/Y좌표 컬럼이 있는 CSV를 쓰면 건물 위치도 함께 조회할 수 있다.
+인덱스는 한 번 생성한 뒤 디스크(pickle)에 캐시하고, 원본 파일이 바뀌면 다시 생성한다.
+"""
+
+import csv
+import os
+import pickle
+import re
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+# 검증 결과 정의
+MATCH_EXACT = "일치"      # 건물번호/지번까지 일치
+MATCH_FUZZY = "유사"      # 도로명/법정동까지만 일치
+MATCH_NONE = "불일치"     # 주소 DB에서 찾을 수 없음
+
+INDEX_VERSION = 3
+INDEX_CACHE_SUFFIX = ".index.pkl"
+DB_FILE_EXTENSIONS = ('.txt', '.csv')
+DB_ENCODINGS = ('utf-8-sig', 'cp949')
+
+# 헤더가 없는 주소 DB('|' 구분) 컬럼 배치
+# 도로명주소 한글
+JUSO_COLUMNS = [
+    '도로명주소관리번호', '법정동코드', '시도명', '시군구명', '법정읍면동명', '법정리명',
+    '산여부', '지번본번', '지번부번', '도로명코드', '도로명', '지하여부', '건물본번', '건물부번',
+]
+# 위치정보요약 (좌표: UTM-K)
+LOCATION_COLUMNS = [
+    '시군구코드', '출입구일련번호', '법정동코드', '시도명', '시군구명', '읍면동명',
+    '도로명코드', '도로명', '지하여부', '건물본번', '건물부번', '건물명', '우편번호',
+    '건물용도분류', '건물군여부', '관할행정동', 'X좌표', 'Y좌표',
+]
+HEADERLESS_LAYOUTS = [LOCATION_COLUMNS, JUSO_COLUMNS]
+
+# 시도명 표기 통일 (정식 명칭/약칭 → 약칭)
+SIDO_ALIASES = {
+    '서울특별시': '서울', '서울시': '서울',
+    '부산광역시': '부산', '부산시': '부산',
+    '대구광역시': '대구', '대구시': '대구',
+    '인천광역시': '인천', '인천시': '인천',
+    '광주광역시': '광주', '광주시': '광주',
+    '대전광역시': '대전', '대전시': '대전',
+    '울산광역시': '울산', '울산시': '울산',
+    '세종특별자치시': '세종', '세종시': '세종',
+    '경기도': '경기',
+    '강원특별자치도': '강원', '강원도': '강원',
+    '충청북도': '충북',
+    '충청남도': '충남',
+    '전북특별자치도': '전북', '전라북도': '전북',
+    '전라남도': '전남',
+    '경상북도': '경북',
+    '경상남도': '경남',
+    '제주특별자치도': '제주', '제주도': '제주',
+}
+SIDO_NAMES = set(SIDO_ALIASES.values())
+
+ROAD_PATTERN = re.compile(r'^(.+(?:로|길))(\d+(?:-\d+)?)?$')
+NUMBER_PATTERN = re.compile(r'^(산)?(\d+)(?:-(\d+))?(?:번지)?$')
+SIDE_ROAD_PATTERN = re.compile(r'^\d+번?길$')  # '남동서로 123번길' 처럼 띄어 쓴 길 번호
+AREA_SUFFIXES = ('동', '리', '가', '읍', '면')
+SIGUNGU_SUFFIXES = ('시', '군', '구')
+
+
+def normalize_sido(token: str) -> Optional[str]:
+    """시도명을 약칭으로 통일 (시도명이 아니면 None)"""
+    if token in SIDO_NAMES:
+        return token
+    return SIDO_ALIASES.get(token)
+
+
+def _to_int_str(value) -> str:
+    """본번/부번 표기 통일 ('0012' → '12', 빈 값 → '0')"""
+    value = str(value).strip()
+    return str(int(value)) if value.isdigit() else '0'
+
+
+def _is_san(value) -> bool:
+    """산여부 값 해석 ('1', '산' 등)"""
+    return str(value).strip() in ('1', '산', 'Y', 'y')
+
+
+def _road_keys(sido: str, sigungu: str, road: str, main, sub) -> Tuple[str, str, str]:
+    """도로명주소 키 (정확/도로명 단위/시군구 생략 도로명 단위)"""
+    road = road.replace(' ', '')
+    return (
+        f"R|{sido}|{sigungu}|{road}|{_to_int_str(main)}|{_to_int_str(sub)}",
+        f"R|{sido}|{sigungu}|{road}",
+        f"R|{sido}||{road}",
+    )
+
+
+def _jibun_keys(sido: str, sigungu: str, area: str, san: bool, main, sub) -> Tuple[str, str, str]:
+    """지번주소 키 (정확/법정동·리 단위/시군구 생략 법정동·리 단위)"""
+    return (
+        f"J|{sido}|{sigungu}|{area}|{'산' if san else ''}{_to_int_str(main)}|{_to_int_str(sub)}",
+        f"J|{sido}|{sigungu}|{area}",
+        f"J|{sido}||{area}",
+    )
+
+
+def address_keys(addr: str) -> Optional[Tuple[str, str, str]]:
+    """검색용주소를 정규화된 인덱스 키로 변환 (해석 불가 시 None)"""
+    tokens = str(addr).split()
+    if len(tokens) < 2:
+        return None
+
+    sido = normalize_sido(tokens[0])
+    if sido is None:
+        return None
+
+    # 시군구 (예: '수원시 팔달구' 처럼 두 토큰일 수 있음)
+    pos = 1
+    sigungu_tokens = []
+    while (pos < len(tokens) and tokens[pos].endswith(SIGUNGU_SUFFIXES)
+           and not ROAD_PATTERN.match(tokens[pos])):
+        sigungu_tokens.append(tokens[pos])
+        pos += 1
+    sigungu = ' '.join(sigungu_tokens)
+
+    # '<도로명> <N>번길' 은 한 도로명으로 합침
+    rest = []
+    for token in tokens[pos:]:
+        if rest and SIDE_ROAD_PATTERN.match(token) and rest[-1].endswith(('로', '길')):
+            rest[-1] += token
+        else:
+            rest.append(token)
+
+    for i, token in enumerate(rest):
+        # 도로명주소: '발안공단로 123-4' 또는 '발안공단로123-4'
+        road_match = ROAD_PATTERN.match(token)
+        if road_match:
+            road, number = road_match.groups()
+            if number is None and i + 1 < len(rest):
+                number = rest[i + 1]
+            number_match = NUMBER_PATTERN.match(number or '')
+            if number_match and not number_match.group(1):
+                return _road_keys(sido, sigungu, road, number_match.group(2), number_match.group(3) or 0)
+
+    for i, token in enumerate(rest[:-1]):
+        # 지번주소: '구문천리 123-4', '구문천리 산 12', '구문천리 55번지'
+        if not token.endswith(AREA_SUFFIXES):
+            continue
+        number = rest[i + 1]
+        if number == '산' and i + 2 < len(rest):
+            number = '산' + rest[i + 2]
+        number_match = NUMBER_PATTERN.match(number)
+        if number_match:
+            san, main, sub = number_match.groups()
+            return _jibun_keys(sido, sigungu, token, bool(san), main, sub or 0)
+
+    return None
+
+
+class AddressIndex:
+    """정규화된 주소 키 해시 인덱스"""
+
+    def __init__(self):
+        self.exact = set()
+        self.partial = set()
+        self.coords = {}
+
+    def __len__(self) -> int:
+        return len(self.exact)
+
+    def add(self, keys: Tuple[str, str, str], coord: Optional[Tuple[float, float]] = None):
+        exact, partial, loose = keys
+        self.exact.add(exact)
+        self.partial.add(partial)
+        self.partial.add(loose)
+        if coord is not None:
+            self.coords[exact] = coord
+
+    def match(self, addr: str) -> str:
+        """검색용주소의 검증 결과 (일치/유사/불일치)"""
+        keys = address_keys(addr)
+        if keys is None:
+            return MATCH_NONE
+        exact, partial, loose = keys
+        if exact in self.exact:
+            return MATCH_EXACT
+        if partial in self.partial or loose in self.partial:
+            return MATCH_FUZZY
+        return MATCH_NONE
+
+    def locate(self, addr: str) -> Optional[Tuple[float, float]]:
+        """검색용주소의 좌표 (X, Y) - 정확히 일치하고 좌표가 있을 때만"""
+        keys = address_keys(addr)
+        if keys is None:
+            return None
+        return self.coords.get(keys[0])
+
+
+def _db_files(path: str) -> List[str]:
+    """주소 DB 경로(파일 또는 시도별 파일이 담긴 폴더)의 데이터 파일 목록"""
+    if os.path.isdir(path):
+        return sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if name.lower().endswith(DB_FILE_EXTENSIONS)
+        )
+    return [path]
+
+
+def _read_rows(file_path: str) -> Iterator[dict]:
+    """주소 DB 파일을 행 단위 dict로 읽기 (헤더 유무/구분자/인코딩 자동 감지)"""
+    for encoding in DB_ENCODINGS:
+        try:
+            with open(file_path, encoding=encoding, newline='') as f:
+                first_line = f.readline()
+            break
+        except UnicodeDecodeError:
+            continue
+    else:
+        raise ValueError(f"주소 DB 인코딩을 알 수 없습니다: {file_path}")
+
+    delimiter = '|' if '|' in first_line else ','
+    has_header = '시도명' in first_line
+    layout = None if has_header else _detect_layout(first_line.rstrip('\r\n').split(delimiter), file_path)
+
+    with open(file_path, encoding=encoding, newline='') as f:
+        if has_header:
+            reader = csv.DictReader(f, delimiter=delimiter)
+            reader.fieldnames = [name.strip() for name in reader.fieldnames]
+        else:
+            reader = csv.DictReader(f, fieldnames=layout, delimiter=delimiter)
+        yield from reader
+
+
+def _detect_layout(fields: List[str], file_path: str) -> List[str]:
+    """헤더 없는 파일의 첫 행으로 컬럼 배치 판별 (시도명 위치와 좌표 값으로 확인)"""
+    for layout in HEADERLESS_LAYOUTS:
+        if len(fields) < len(layout):
+            continue
+        row = dict(zip(layout, fields))
+        if normalize_sido(row['시도명'].strip()) is None:
+            continue
+        if 'X좌표' in row and _row_coord(row) is None:
+            continue
+        return layout
+    raise ValueError(f"주소 DB 형식을 알 수 없습니다 (헤더가 있는 CSV 필요): {file_path}")
+
+
+def _row_coord(row: dict) -> Optional[Tuple[float, float]]:
+    """주소 DB 한 행의 좌표 (없으면 None)"""
+    try:
+        return float(row['X좌표']), float(row['Y좌표'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _row_keys(row: dict) -> Iterable[Tuple[str, str, str]]:
+    """주소 DB 한 행에서 도로명/지번 키 생성"""
+    sido = normalize_sido((row.get('시도명') or '').strip())
+    if sido is None:
+        return
+    sigungu = ' '.join((row.get('시군구명') or '').split())
+
+    road = (row.get('도로명') or '').strip()
+    if road and (row.get('건물본번') or '').strip():
+        yield _road_keys(sido, sigungu, road, row['건물본번'], row.get('건물부번') or 0)
+
+    area = (row.get('법정리명') or '').strip() or (row.get('법정읍면동명') or '').strip()
+    if area and (row.get('지번본번') or '').strip():
+        yield _jibun_keys(sido, sigungu, area, _is_san(row.get('산여부')),
+                          row['지번본번'], row.get('지번부번') or 0)
+
+
+def build_index(path: str) -> AddressIndex:
+    """주소 DB 파일을 읽어 인덱스 생성"""
+    index = AddressIndex()
+    for file_path in _db_files(path):
+        for row in _read_rows(file_path):
+            coord = _row_coord(row)
+            for keys in _row_keys(row):
+                index.add(keys, coord)
+    return index
+
+
+def _signature(path: str) -> list:
+    """원본 파일 변경 감지용 서명 (파일명, 크기, 수정시각)"""
+    return [
+        (os.path.basename(p), os.path.getsize(p), int(os.path.getmtime(p)))
+        for p in _db_files(path)
+    ]
+
+
+def default_cache_path(path: str) -> str:
+    """인덱스 캐시 파일 기본 경로"""
+    if os.path.isdir(path):
+        return os.path.join(path, 'address' + INDEX_CACHE_SUFFIX)
+    return path + INDEX_CACHE_SUFFIX
+
+
+def load_index(path: str, cache_path: Optional[str] = None) -> AddressIndex:
+    """디스크 캐시가 유효하면 불러오고, 아니면 새로 생성하여 저장"""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"주소 DB를 찾을 수 없습니다: {path}")
+
+    cache_path = cache_path or default_cache_path(path)
+    signature = _signature(path)
+
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'rb') as f:
+                cached = pickle.load(f)
+            if cached.get('version') == INDEX_VERSION and cached.get('signature') == signature:
+                return cached['index']
+        except Exception:
+            # 손상되었거나 이전 버전 코드로 만든 캐시는 무시하고 다시 생성
+            pass
+
+    index = build_index(path)
+    try:
+        with open(cache_path, 'wb') as f:
+            pickle.dump(
+                {'version': INDEX_VERSION, 'signature': signature, 'index': index},
+                f, protocol=pickle.HIGHEST_PROTOCOL
+            )
+    except OSError:
+        # 캐시 저장 실패는 검증 자체에 영향 없음
+        pass
+    return index
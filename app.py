@@ -3,22 +3,41 @@
 Factory Database Inspection System
 """
 
+from __future__ import annotations
+
+import time
+SCRIPT_START = time.perf_counter()
+
 import streamlit as st
-import pandas as pd
+import streamlit.components.v1 as components
 import re
 import os
+import csv
 import io
+import logging
 from dotenv import load_dotenv
-import streamlit.components.v1 as components
 import urllib.parse
-from typing import Optional, Tuple
+from typing import TYPE_CHECKING, Optional, Tuple
+import address_index
+import verdict_store
+
+# pandas는 파일 업로드 후 load_heavy_modules()에서 로드
+if TYPE_CHECKING:
+    import pandas as pd
+
+IMPORT_DONE = time.perf_counter()
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+logger = logging.getLogger("app")
 
 # ==========================================
 # 환경 설정 로드
 # ==========================================
 load_dotenv()
 KAKAO_JS_KEY = os.getenv("KAKAO_JS_KEY")
+MAP_SERVER_URL = os.getenv("MAP_SERVER_URL")  # 지도를 제공할 맵 서버 (예: http://localhost:5001, 미설정 시 GitHub Pages 지도)
 ACCESS_PASSWORD = os.getenv("ACCESS_PASSWORD")
+ADDRESS_DB_PATH = os.getenv("ADDRESS_DB_PATH")  # 주소 DB 경로 (미설정 시 주소 검증 생략)
+VERDICT_STORE_PATH = os.getenv("VERDICT_STORE_PATH")  # 검수결과 저장소 (영구 저장 경로, 미설정 시 승계 생략)
 
 # ==========================================
 # 필터링 및 정제 규칙
@@ -28,6 +47,8 @@ MAX_EMPLOYEES = 300      # 최대 종업원수
 INDUSTRY_MIN = 10        # 산업코드 시작
 INDUSTRY_MAX = 34        # 산업코드 끝
 APPEND_NAME = True       # 주소 뒤에 공장명 붙일지 여부
+SORT_BY_LOCATION = True  # 좌표가 있으면 검수 순서를 지도상 가까운 순으로 정렬
+HILBERT_ORDER = 16       # 위치 정렬용 힐베르트 곡선 격자 크기 (2^16 x 2^16)
 
 # 필수 컬럼 정의
 REQUIRED_COLUMNS = ['공장명', '주소', '종업원수', '기업구분', '업종코드']
@@ -38,6 +59,16 @@ STATUS_PENDING = "미검수"
 STATUS_PASS = "PASS"
 STATUS_CLOSED = "폐업"
 
+# 이전 분기 검수결과 승계 표시 컬럼
+INHERITED_COLUMN = '이전검수'
+INHERITED_MARK = '승계'
+
+# 주소 검증 컬럼 (주소 DB 대조 결과: 일치/유사/불일치)
+MATCH_COLUMN = '주소검증'
+
+# 좌표 컬럼 후보 (X, Y) - 업로드 파일에 있거나 주소 DB에서 채움
+COORD_COLUMNS = [('경도', '위도'), ('X좌표', 'Y좌표')]
+
 # ==========================================
 # Streamlit 페이지 설정
 # ==========================================
@@ -50,12 +81,17 @@ st.set_page_config(
 # ==========================================
 # 커스텀 CSS 스타일
 # ==========================================
-st.markdown("""
+# 로그인/첫 화면에는 기본 UI 숨김만 적용하고, 전체 스타일은 로그인 후 주입
+BASE_CSS = """
 <style>
     /* 기본 UI 요소 숨기기 */
     #MainMenu {visibility: hidden;}
     footer {visibility: hidden;}
-    
+</style>
+"""
+
+CUSTOM_CSS = """
+<style>
     /* 레이아웃 최적화 */
     .block-container {
         padding-top: 2.7rem;
@@ -109,12 +145,56 @@ st.markdown("""
         padding: 0.25rem !important;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+st.markdown(BASE_CSS, unsafe_allow_html=True)
 
 # ==========================================
 # 유틸리티 함수들
 # ==========================================
 
+def load_heavy_modules():
+    """무거운 모듈(pandas)을 처음 필요할 때 로드"""
+    global pd
+    import pandas as pd
+
+
+@st.cache_resource(show_spinner=False)
+def get_process_state() -> dict:
+    """프로세스 단위 상태 (첫 세션 여부 판별용)"""
+    return {'cold': True}
+
+
+def init_startup_timing():
+    """세션 첫 실행 시 cold start 여부 판별 (세션당 한 번)"""
+    if 'startup_kind' in st.session_state:
+        return
+    state = get_process_state()
+    st.session_state.startup_kind = "cold start" if state['cold'] else "new session"
+    state['cold'] = False
+
+
+def log_startup_time(screen: str):
+    """세션별로 각 화면이 처음 표시될 때 이번 실행의 소요 시간 기록"""
+    flag = f"startup_logged_{screen}"
+    if st.session_state.get(flag):
+        return
+    st.session_state[flag] = True
+    
+    now = time.perf_counter()
+    message = "%s: %s 화면 %.0fms (import %.0fms)"
+    args = [
+        st.session_state.startup_kind, screen,
+        (now - SCRIPT_START) * 1000,
+        (IMPORT_DONE - SCRIPT_START) * 1000,
+    ]
+    # 로그인 직후 첫 화면이면 인증 성공부터 표시까지 걸린 시간도 함께 기록
+    if 'login_at' in st.session_state:
+        message += ", 로그인 후 %.0fms"
+        args.append((now - st.session_state.pop('login_at')) * 1000)
+    logger.info(message, *args)
+
+
 def validate_environment() -> bool:
     """환경 변수 검증"""
     if not KAKAO_JS_KEY:
@@ -186,6 +266,161 @@ def clean_address(row: pd.Series) -> pd.Series:
     return pd.Series([search_addr, final_addr])
 
 
+def find_coord_columns(df: pd.DataFrame) -> Optional[Tuple[str, str]]:
+    """데이터프레임의 좌표 컬럼 (X, Y) 찾기"""
+    for x_col, y_col in COORD_COLUMNS:
+        if x_col in df.columns and y_col in df.columns:
+            return x_col, y_col
+    return None
+
+
+def hilbert_key(x: int, y: int, n: int) -> int:
+    """n x n 격자 좌표의 힐베르트 곡선 순번 (가까운 칸끼리 순번도 가까움)"""
+    d = 0
+    s = n // 2
+    while s > 0:
+        rx = 1 if x & s else 0
+        ry = 1 if y & s else 0
+        d += s * s * ((3 * rx) ^ ry)
+        if ry == 0:
+            if rx == 1:
+                x, y = n - 1 - x, n - 1 - y
+            x, y = y, x
+        s //= 2
+    return d
+
+
+def sort_queue(df: pd.DataFrame) -> Tuple[pd.DataFrame, str]:
+    """검수 순서 정렬 (좌표가 있으면 위치순, 없으면 검색용주소 가나다순)"""
+    coord_cols = find_coord_columns(df) if SORT_BY_LOCATION else None
+    if coord_cols is not None:
+        x = pd.to_numeric(df[coord_cols[0]], errors='coerce')
+        y = pd.to_numeric(df[coord_cols[1]], errors='coerce')
+        located = x.notna() & y.notna()
+        
+        if located.any():
+            # 좌표 범위를 격자에 맞춰 정규화한 뒤 힐베르트 순번 계산
+            n = 1 << HILBERT_ORDER
+            span = max(x[located].max() - x[located].min(), y[located].max() - y[located].min()) or 1
+            gx = ((x[located] - x[located].min()) / span * (n - 1)).astype(int)
+            gy = ((y[located] - y[located].min()) / span * (n - 1)).astype(int)
+            
+            order_key = pd.Series(float('inf'), index=df.index)
+            order_key[located] = [hilbert_key(i, j, n) for i, j in zip(gx, gy)]
+            
+            # 좌표 없는 행은 맨 뒤에 가나다순
+            df = df.assign(_order=order_key).sort_values(by=['_order', '검색용주소'])
+            df = df.drop(columns='_order').reset_index(drop=True)
+            return df, f"지도 위치순 정렬 완료 (좌표 있음 {located.sum():,}건)"
+    
+    df = df.sort_values(by='검색용주소').reset_index(drop=True)
+    return df, "주소 가나다순 정렬 완료"
+
+
+@st.cache_resource(show_spinner=False)
+def get_address_index(path: str) -> address_index.AddressIndex:
+    """주소 DB 인덱스 로드 (프로세스당 한 번, 디스크 캐시 사용)"""
+    return address_index.load_index(path)
+
+
+def apply_address_validation(df: pd.DataFrame) -> pd.DataFrame:
+    """검색용주소를 주소 DB와 대조하여 주소검증 컬럼 추가"""
+    if not ADDRESS_DB_PATH or '검색용주소' not in df.columns:
+        return df
+    
+    try:
+        with st.spinner('주소 DB 대조 중...'):
+            index = get_address_index(ADDRESS_DB_PATH)
+            df[MATCH_COLUMN] = df['검색용주소'].map(index.match)
+            
+            # 주소 DB에 좌표가 있고 파일에 좌표가 없으면 채움
+            if index.coords and find_coord_columns(df) is None:
+                x_col, y_col = COORD_COLUMNS[-1]
+                coords = df['검색용주소'].map(index.locate)
+                df[x_col] = coords.str[0]
+                df[y_col] = coords.str[1]
+    except (OSError, ValueError, csv.Error) as e:
+        st.warning(f"주소 검증을 건너뜁니다: {str(e)}")
+        return df
+    
+    counts = df[MATCH_COLUMN].value_counts()
+    st.info(
+        f"주소 검증: 일치 {counts.get(address_index.MATCH_EXACT, 0):,}건 / "
+        f"유사 {counts.get(address_index.MATCH_FUZZY, 0):,}건 / "
+        f"불일치 {counts.get(address_index.MATCH_NONE, 0):,}건"
+    )
+    return df
+
+
+def apply_verdict_store(df: pd.DataFrame) -> pd.DataFrame:
+    """저장소의 이전 검수결과/최종주소를 미검수 행에 승계 (원본 주소가 그대로인 공장만)"""
+    if not VERDICT_STORE_PATH or '검색용주소' not in df.columns or '주소' not in df.columns:
+        return df
+    
+    try:
+        verdicts = verdict_store.load_verdicts(VERDICT_STORE_PATH)
+    except (OSError, csv.Error) as e:
+        st.warning(f"이전 검수결과를 불러오지 못했습니다: {str(e)}")
+        return df
+    if not verdicts:
+        return df
+    
+    keys = pd.Series(
+        [verdict_store.verdict_key(n, a) for n, a in zip(df['공장명'], df['검색용주소'])],
+        index=df.index
+    )
+    found = keys.map(verdicts)
+    
+    # 층/호 등 상세주소만 바뀐 경우도 검색용주소는 같으므로 원본 주소까지 비교
+    current_addr = df['주소'].map(verdict_store.normalize_address)
+    same_addr = pd.Series(
+        [isinstance(f, tuple) and f[2] == a for f, a in zip(found, current_addr)],
+        index=df.index
+    )
+    inherited = same_addr & (df['검수결과'] == STATUS_PENDING)
+    
+    if inherited.any():
+        df.loc[inherited, '검수결과'] = found[inherited].str[0]
+        df.loc[inherited, '최종주소'] = [
+            replace_name_suffix(final_addr, old_name, name)
+            for (_, final_addr, _, old_name), name in zip(found[inherited], df.loc[inherited, '공장명'])
+        ]
+        df.loc[inherited, INHERITED_COLUMN] = INHERITED_MARK
+        remaining = (df['검수결과'] == STATUS_PENDING).sum()
+        st.info(f"이전 검수결과 승계: {inherited.sum():,}건 (신규/변경 {remaining:,}건만 검수 대상)")
+    return df
+
+
+def replace_name_suffix(final_addr: str, old_name: str, new_name: str) -> str:
+    """승계한 최종주소 끝의 이전 공장명을 현재 공장명으로 교체"""
+    old_name, new_name = str(old_name), str(new_name)
+    if APPEND_NAME and old_name and old_name != new_name and final_addr.endswith(old_name):
+        return f"{final_addr[:-len(old_name)].rstrip()} {new_name}"
+    return final_addr
+
+
+def remember_verdicts(indices: list, status: Optional[str] = None):
+    """검수 처리 내용을 저장소에 기록 (status=''이면 기록 취소)"""
+    if not VERDICT_STORE_PATH:
+        return
+    
+    df = st.session_state.df
+    entries = [
+        (
+            df.at[idx, '공장명'],
+            df.at[idx, '검색용주소'],
+            df.at[idx, '주소'] if '주소' in df.columns else '',
+            df.at[idx, '검수결과'] if status is None else status,
+            df.at[idx, '최종주소'],
+        )
+        for idx in indices
+    ]
+    try:
+        verdict_store.append_verdicts(VERDICT_STORE_PATH, entries)
+    except OSError as e:
+        st.warning(f"검수결과 저장소 기록 실패: {str(e)}")
+
+
 def load_and_filter(file) -> Optional[pd.DataFrame]:
     """파일 로드 및 필터링 처리"""
     try:
@@ -230,6 +465,9 @@ def load_and_filter(file) -> Optional[pd.DataFrame]:
         if status == "processed":
             if '검수결과' not in df.columns:
                 df['검수결과'] = STATUS_PENDING
+            df = apply_verdict_store(df)
+            if MATCH_COLUMN not in df.columns:
+                df = apply_address_validation(df)
             st.success(f"이전 작업 파일을 불러왔습니다 ({len(df):,}건)")
             return df.reset_index(drop=True)
         
@@ -278,12 +516,18 @@ def load_and_filter(file) -> Optional[pd.DataFrame]:
         with st.spinner('주소 정제 중...'):
             df[['검색용주소', '최종주소']] = df.apply(clean_address, axis=1)
         
+        # 주소 DB 대조 (ADDRESS_DB_PATH 설정 시)
+        df = apply_address_validation(df)
+        
         # 검수결과 초기화
         df['검수결과'] = STATUS_PENDING
         
-        # 가나다순 정렬 (검색용주소 기준)
-        df = df.sort_values(by='검색용주소').reset_index(drop=True)
-        st.success("주소 가나다순 정렬 완료")
+        # 이전 분기 검수결과 승계
+        df = apply_verdict_store(df)
+        
+        # 검수 순서 정렬 (좌표 있으면 위치순, 없으면 검색용주소 가나다순)
+        df, sort_message = sort_queue(df)
+        st.success(sort_message)
         
         return df
         
@@ -335,6 +579,8 @@ def compute_stats(df: pd.DataFrame) -> dict:
 # 인증 시스템
 # ==========================================
 
+init_startup_timing()
+
 if not validate_environment():
     st.stop()
 
@@ -357,13 +603,17 @@ if not st.session_state.auth:
         if pwd:
             if pwd == ACCESS_PASSWORD:
                 st.session_state.auth = True
+                st.session_state.login_at = time.perf_counter()
                 st.success("인증 성공!")
                 st.rerun()
             else:
                 st.error("비밀번호가 일치하지 않습니다.")
     
+    log_startup_time("login")
     st.stop()
 
+st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+
 # ==========================================
 # 메인 UI
 # ==========================================
@@ -380,6 +630,8 @@ with center_col:
 
 # 파일 업로드 처리
 if uploaded_file:
+    load_heavy_modules()
+    
     # 세션 상태 초기화
     if "history" not in st.session_state:
         st.session_state.history = []
@@ -421,6 +673,20 @@ if uploaded_file:
     if stats['total'] > 0:
         st.progress(stats['progress'] / 100)
     
+    # 주소 DB 일치 항목 일괄 PASS
+    if MATCH_COLUMN in df.columns:
+        exact_pending = df.index[
+            (df['검수결과'] == STATUS_PENDING) & (df[MATCH_COLUMN] == address_index.MATCH_EXACT)
+        ]
+        if len(exact_pending) > 0:
+            if st.button(f"주소 DB 일치 {len(exact_pending):,}건 일괄 PASS", key="btn_pass_exact"):
+                # 일괄 처리는 한 번의 "이전 취소"로 되돌리도록 묶어서 기록
+                st.session_state.history.append(exact_pending.tolist())
+                st.session_state.df.loc[exact_pending, '검수결과'] = STATUS_PASS
+                remember_verdicts(exact_pending.tolist())
+                st.session_state.df_changed = True
+                st.rerun()
+    
     st.divider()
     
     # ==========================================
@@ -445,6 +711,8 @@ if uploaded_file:
             # 추가 정보 (있는 경우)
             if '종업원수' in target_row:
                 st.caption(f"종업원수: {target_row['종업원수']}명")
+            if MATCH_COLUMN in target_row:
+                st.caption(f"주소검증: {target_row[MATCH_COLUMN]}")
             
             st.write("---")
             
@@ -468,6 +736,7 @@ if uploaded_file:
                     if not current_addr.endswith(factory_name):
                         st.session_state.df.at[target_idx, '최종주소'] = f"{current_addr.rstrip()} {factory_name}"
                     st.session_state.df.at[target_idx, '검수결과'] = STATUS_PASS
+                    remember_verdicts([target_idx])
                     st.rerun()
                 
                 if st.button("업체명 제외", use_container_width=True, key="pass_no_name"):
@@ -477,18 +746,22 @@ if uploaded_file:
                     if current_addr.endswith(factory_name):
                         st.session_state.df.at[target_idx, '최종주소'] = current_addr[:-len(factory_name)].rstrip()
                     st.session_state.df.at[target_idx, '검수결과'] = STATUS_PASS
+                    remember_verdicts([target_idx])
                     st.rerun()
 
             with btn_col2:
                 if st.button("폐업/철거", use_container_width=True, key="btn_closed"):
                     st.session_state.history.append(target_idx)
                     st.session_state.df.at[target_idx, '검수결과'] = STATUS_CLOSED
+                    remember_verdicts([target_idx])
                     st.session_state.df_changed = True
                     st.rerun()
                 
                 if st.button("이전 취소", disabled=len(st.session_state.history) == 0, use_container_width=True, key="btn_undo"):
-                    last_idx = st.session_state.history.pop()
-                    st.session_state.df.at[last_idx, '검수결과'] = STATUS_PENDING
+                    last = st.session_state.history.pop()
+                    last_indices = last if isinstance(last, list) else [last]
+                    st.session_state.df.loc[last_indices, '검수결과'] = STATUS_PENDING
+                    remember_verdicts(last_indices, status='')
                     st.session_state.df_changed = True
                     st.rerun()
 
@@ -569,7 +842,11 @@ if uploaded_file:
         if not pending_df.empty:
             search_addr = target_row['검색용주소']
             encoded_addr = urllib.parse.quote(search_addr)
-            map_url = f"https://inkkadiis.github.io/ED-DB_project/static/map.html?addr={encoded_addr}&key={KAKAO_JS_KEY}"
+            if MAP_SERVER_URL:
+                # 맵 서버의 /map을 쓰면 주소 조회 결과 보고(/report)가 같은 origin으로 전송됨
+                map_url = f"{MAP_SERVER_URL.rstrip('/')}/map?addr={encoded_addr}"
+            else:
+                map_url = f"https://inkkadiis.github.io/ED-DB_project/static/map.html?addr={encoded_addr}&key={KAKAO_JS_KEY}"
             components.iframe(map_url, height=900, scrolling=False)
         else:
             st.info("검수할 항목이 없습니다.")
@@ -698,9 +975,26 @@ else:
             - 종업원수: {MIN_EMPLOYEES}명 ~ {MAX_EMPLOYEES}명
             - 기업구분: 소기업, 중기업
             - 산업코드: {INDUSTRY_MIN} ~ {INDUSTRY_MAX}
+            
+            ### 주소 검증 (선택)
+            - `.env`에 `ADDRESS_DB_PATH`(주소 DB 파일 또는 폴더)를 설정하면 검색용주소를 주소 DB와 대조합니다.
+            - 결과는 `주소검증` 컬럼(일치/유사/불일치)에 기록되며, 일치 항목은 일괄 PASS 할 수 있습니다.
+            
+            ### 이전 검수결과 승계
+            - `.env`에 `VERDICT_STORE_PATH`를 설정하면 검수 처리 내용이 해당 CSV에 기록됩니다 (미설정 시 사용 안 함).
+            - 재시작 시 초기화되지 않는 영구 저장 경로를 지정해야 합니다 (Streamlit Cloud의 작업 폴더는 재배포 시 삭제됨).
+            - 새 분기 파일에서 공장명과 주소(층/호 포함)가 같은 공장은 이전 검수결과와 최종주소를 그대로 승계합니다 (`이전검수` 컬럼).
+            - 신규 또는 주소가 바뀐 공장만 검수 대상으로 남습니다.
+            
+            ### 검수 순서
+            - 파일에 좌표(`경도`/`위도` 또는 `X좌표`/`Y좌표`)가 있거나 주소 DB에 좌표가 있으면 지도상 가까운 공장끼리 이어서 검수하도록 정렬합니다.
+            - 주소 DB 좌표는 위치정보요약 파일 또는 `X좌표`/`Y좌표` 헤더가 있는 CSV에서 읽습니다 (도로명주소 한글 파일에는 좌표 없음).
+            - 좌표가 없으면 검색용주소 가나다순으로 정렬합니다.
             """.format(
                 MIN_EMPLOYEES=MIN_EMPLOYEES,
                 MAX_EMPLOYEES=MAX_EMPLOYEES,
                 INDUSTRY_MIN=INDUSTRY_MIN,
                 INDUSTRY_MAX=INDUSTRY_MAX
             ))
+    
+    log_startup_time("landing")
@@ -1,14 +1,121 @@
 """
 간단한 Flask 서버로 map.html을 제공
 Streamlit과 함께 실행하여 iframe에서 올바른 origin 제공
+/metrics 에서 요청 수/지연시간/주소 조회 실패율을 Prometheus 텍스트 형식으로 제공
 """
-from flask import Flask, request, render_template_string
+from flask import Flask, Response, request, render_template_string, g
 import os
+import time
+import logging
+import threading
+from collections import defaultdict
 from dotenv import load_dotenv
 
 load_dotenv()
 app = Flask(__name__)
 
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+logger = logging.getLogger("map_server")
+
+
+class _SkipAccessLog(logging.Filter):
+    """werkzeug의 요청별 접근 로그만 제외 (요청 로그는 record_request에서 지연시간과 함께 남김)"""
+    def filter(self, record):
+        return ' - - [' not in str(record.msg)
+
+
+logging.getLogger("werkzeug").addFilter(_SkipAccessLog())
+
+# ==========================================
+# 메트릭 수집
+# ==========================================
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+GEOCODE_RESULTS = ('ok', 'fail')
+
+_metrics_lock = threading.Lock()
+_request_counts = defaultdict(int)                                   # (route, method, status) -> 건수
+_latency_buckets = defaultdict(lambda: [0] * len(LATENCY_BUCKETS))   # route -> 버킷별 누적 건수
+_latency_sum = defaultdict(float)                                    # route -> 지연시간 합계
+_latency_count = defaultdict(int)                                    # route -> 건수
+_geocode_counts = {result: 0 for result in GEOCODE_RESULTS}          # 페이지에서 보고한 주소 조회 결과
+_in_flight = 0
+
+
+def _route_label() -> str:
+    """메트릭 라벨용 라우트 (등록되지 않은 경로는 하나로 묶음)"""
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+
+@app.before_request
+def start_timer():
+    global _in_flight
+    g.start_time = time.perf_counter()
+    with _metrics_lock:
+        _in_flight += 1
+
+
+@app.after_request
+def record_request(response):
+    elapsed = time.perf_counter() - g.start_time
+    route = _route_label()
+    
+    with _metrics_lock:
+        _request_counts[(route, request.method, response.status_code)] += 1
+        buckets = _latency_buckets[route]
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if elapsed <= bound:
+                buckets[i] += 1
+        _latency_sum[route] += elapsed
+        _latency_count[route] += 1
+    
+    logger.info("%s %s %d %.1fms", request.method, request.full_path.rstrip('?'),
+                response.status_code, elapsed * 1000)
+    return response
+
+
+@app.teardown_request
+def finish_request(exc):
+    # 예외로 after_request가 생략되어도 진행 중 요청 수는 항상 감소
+    global _in_flight
+    if 'start_time' in g:
+        with _metrics_lock:
+            _in_flight -= 1
+
+
+def render_metrics() -> str:
+    """Prometheus 텍스트 형식으로 메트릭 출력"""
+    lines = []
+    with _metrics_lock:
+        lines.append("# HELP map_server_requests_total Total HTTP requests by route, method and status.")
+        lines.append("# TYPE map_server_requests_total counter")
+        for (route, method, status), count in sorted(_request_counts.items()):
+            lines.append(f'map_server_requests_total{{route="{route}",method="{method}",status="{status}"}} {count}')
+        
+        lines.append("# HELP map_server_request_duration_seconds Request latency by route.")
+        lines.append("# TYPE map_server_request_duration_seconds histogram")
+        for route in sorted(_latency_count):
+            for bound, count in zip(LATENCY_BUCKETS, _latency_buckets[route]):
+                lines.append(f'map_server_request_duration_seconds_bucket{{route="{route}",le="{bound}"}} {count}')
+            lines.append(f'map_server_request_duration_seconds_bucket{{route="{route}",le="+Inf"}} {_latency_count[route]}')
+            lines.append(f'map_server_request_duration_seconds_sum{{route="{route}"}} {_latency_sum[route]:.6f}')
+            lines.append(f'map_server_request_duration_seconds_count{{route="{route}"}} {_latency_count[route]}')
+        
+        lines.append("# HELP map_server_requests_in_flight Requests currently being served.")
+        lines.append("# TYPE map_server_requests_in_flight gauge")
+        lines.append(f"map_server_requests_in_flight {_in_flight}")
+        
+        lines.append("# HELP map_server_geocode_lookups_total Address lookups reported by the map page.")
+        lines.append("# TYPE map_server_geocode_lookups_total counter")
+        for result in GEOCODE_RESULTS:
+            lines.append(f'map_server_geocode_lookups_total{{result="{result}"}} {_geocode_counts[result]}')
+        
+        total = sum(_geocode_counts.values())
+        failure_ratio = _geocode_counts['fail'] / total if total else 0.0
+        lines.append("# HELP map_server_geocode_failure_ratio Share of reported address lookups that failed.")
+        lines.append("# TYPE map_server_geocode_failure_ratio gauge")
+        lines.append(f"map_server_geocode_failure_ratio {failure_ratio:.6f}")
+    return "\n".join(lines) + "\n"
+
 MAP_TEMPLATE = """
 <!DOCTYPE html>
 <html>
@@ -26,6 +133,13 @@ MAP_TEMPLATE = """
         const addr = "{{ addr }}";
         const key = "{{ key }}";
         
+        // 주소 조회 결과를 서버 메트릭으로 보고
+        function report(result) {
+            if (navigator.sendBeacon) {
+                navigator.sendBeacon('/report?result=' + result);
+            }
+        }
+        
         var script = document.createElement('script');
         script.type = 'text/javascript';
         script.src = 'https://dapi.kakao.com/v2/maps/sdk.js?appkey=' + key + '&libraries=services&autoload=false';
@@ -43,8 +157,10 @@ MAP_TEMPLATE = """
                         var map = new kakao.maps.Map(mapContainer, {center: position, level: 2});
                         map.setMapTypeId(kakao.maps.MapTypeId.HYBRID);
                         new kakao.maps.Marker({position: position, map: map});
+                        report('ok');
                     } else {
                         mapContainer.innerHTML = "<div style='padding:20px;'><b>주소를 찾을 수 없습니다:</b><br>" + addr + "</div>";
+                        report('fail');
                     }
                 });
             });
@@ -60,6 +176,19 @@ def show_map():
     key = os.getenv('KAKAO_JS_KEY')
     return render_template_string(MAP_TEMPLATE, addr=addr, key=key)
 
+@app.route('/report', methods=['GET', 'POST'])
+def report_lookup():
+    result = request.args.get('result', '')
+    if result not in GEOCODE_RESULTS:
+        return Response("unknown result", status=400)
+    with _metrics_lock:
+        _geocode_counts[result] += 1
+    return Response(status=204)
+
+@app.route('/metrics')
+def metrics():
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
 if __name__ == '__main__':
     # Streamlit은 8502에서 실행 중이므로 Flask는 다른 포트 사용
     app.run(host='localhost', port=5001, debug=False)
@@ -0,0 +1,113 @@
+"""
+분기별 검수 결과 재사용 저장소
+Cross-release verdict store
+
+(공장명, 검색용주소)를 정규화한 키로 검수결과와 최종주소, 원본 주소를 기록해 두고,
+새 분기 파일을 올리면 원본 주소까지 같은 공장만 이전 결과를 해시 조회로 승계한다.
+(검색용주소는 층/호를 지우므로 원본 주소로 상세주소 변경을 잡아낸다.)
+
+저장소는 추가 전용 CSV 로그이며, 같은 키는 마지막 기록이 우선한다.
+취소 기록(검수결과가 빈 행)은 그 키의 가장 최근 기록 하나만 되돌리므로 이전 분기 결과는 남는다.
+여러 세션이 같은 파일에 기록할 수 있으므로 기록 시 잠금 파일(<path>.lock)을 사용한다.
+저장소 경로는 재시작 후에도 유지되는 영구 저장 위치여야 한다.
+"""
+
+import csv
+import os
+import re
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, Tuple
+
+STORE_COLUMNS = ['키', '공장명', '검색용주소', '주소', '검수결과', '최종주소', '기록시각']
+STORE_ENCODING = 'utf-8-sig'
+
+LOCK_SUFFIX = '.lock'
+LOCK_TIMEOUT = 5.0       # 잠금 대기 최대 시간 (초)
+LOCK_STALE_AFTER = 30.0  # 이보다 오래된 잠금 파일은 비정상 종료로 보고 제거 (초)
+
+# 공장명 정규화 시 제거할 법인 표기
+CORP_MARKERS = re.compile(r'\(주\)|㈜|\(유\)|주식회사|유한회사')
+
+
+def normalize_name(name: str) -> str:
+    """공장명 정규화 (법인 표기/공백 제거)"""
+    return re.sub(r'\s+', '', CORP_MARKERS.sub('', str(name)))
+
+
+def normalize_address(addr: str) -> str:
+    """주소 정규화 (공백 통일)"""
+    return re.sub(r'\s+', ' ', str(addr)).strip()
+
+
+def verdict_key(name: str, search_addr: str) -> str:
+    """저장소 조회 키"""
+    return f"{normalize_name(name)}|{normalize_address(search_addr)}"
+
+
+def load_verdicts(path: str) -> Dict[str, Tuple[str, str, str, str]]:
+    """저장소 로그를 읽어 키별 최신 (검수결과, 최종주소, 원본 주소, 공장명) 사전 생성"""
+    history = {}
+    if not os.path.exists(path):
+        return {}
+
+    with open(path, encoding=STORE_ENCODING, newline='') as f:
+        for row in csv.DictReader(f):
+            key = row.get('키')
+            if not key:
+                continue
+            records = history.setdefault(key, [])
+            if row.get('검수결과'):
+                records.append((
+                    row['검수결과'],
+                    row.get('최종주소') or '',
+                    normalize_address(row.get('주소') or ''),
+                    row.get('공장명') or '',
+                ))
+            elif records:
+                # 취소 기록은 가장 최근 기록 하나만 되돌림
+                records.pop()
+    return {key: records[-1] for key, records in history.items() if records}
+
+
+@contextmanager
+def _file_lock(path: str):
+    """잠금 파일을 이용한 프로세스 간 배타적 기록"""
+    lock_path = path + LOCK_SUFFIX
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_path) > LOCK_STALE_AFTER:
+                    os.remove(lock_path)
+                    continue
+            except OSError:
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"저장소 잠금 대기 시간 초과: {lock_path}")
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        os.remove(lock_path)
+
+
+def append_verdicts(path: str, entries: Iterable[Tuple[str, str, str, str, str]]):
+    """(공장명, 검색용주소, 주소, 검수결과, 최종주소) 기록 추가 (검수결과가 빈 문자열이면 취소)"""
+    timestamp = datetime.now().isoformat(timespec='seconds')
+
+    with _file_lock(path):
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        with open(path, 'a', encoding=STORE_ENCODING, newline='') as f:
+            writer = csv.writer(f)
+            if is_new:
+                writer.writerow(STORE_COLUMNS)
+            for name, search_addr, addr, status, final_addr in entries:
+                writer.writerow([
+                    verdict_key(name, search_addr), name, search_addr, addr, status, final_addr, timestamp
+                ])